@@ -5,52 +5,46 @@ from app.db import get_db
 from app.models.models import User
 from app.core.security import hash_password
 
+# (user_id, name, email, badge_number, password, role)
+INITIAL_USERS = [
+    (1, "Admin User", "admin@example.com", "A1001", "admin123", "admin"),
+    (2, "Manager User", "manager@example.com", "M2002", "manager123", "manager"),
+    (3, "Picker User", "picker@example.com", "P3003", "picker123", "picker"),
+]
+
 async def add_initial_users():
     async for db in get_db():
         from datetime import datetime
         now = datetime.utcnow()
-        users = [
-            User(
-                user_id=1,
-                name="Admin User",
-                email="admin@example.com",
-                badge_number="A1001",
-                hashed_password=hash_password("admin123"),
-                role="admin",
-                created_at=now,
-                updated_at=now,
-                last_login=None
-            ),
-            User(
-                user_id=2,
-                name="Manager User",
-                email="manager@example.com",
-                badge_number="M2002",
-                hashed_password=hash_password("manager123"),
-                role="manager",
-                created_at=now,
-                updated_at=now,
-                last_login=None
-            ),
+        # One lookup for all emails; only missing users are built, so the
+        # bcrypt hashing is skipped entirely once the users exist
+        result = await db.execute(
+            select(User.email).where(User.email.in_([spec[2] for spec in INITIAL_USERS]))
+        )
+        existing_emails = set(result.scalars())
+        db.add_all([
             User(
-                user_id=3,
-                name="Picker User",
-                email="picker@example.com",
-                badge_number="P3003",
-                hashed_password=hash_password("picker123"),
-                role="picker",
+                user_id=user_id,
+                name=name,
+                email=email,
+                badge_number=badge_number,
+                hashed_password=hash_password(password),
+                role=role,
                 created_at=now,
                 updated_at=now,
                 last_login=None
-            ),
-        ]
-        for user in users:
-            result = await db.execute(select(User).where(User.email == user.email))
-            if not result.scalar_one_or_none():
-                db.add(user)
+            )
+            for user_id, name, email, badge_number, password, role in INITIAL_USERS
+            if email not in existing_emails
+        ])
         await db.commit()
         print("Initial users added.")
         break
 
 if __name__ == "__main__":
-    asyncio.run(add_initial_users())
+    try:
+        import uvloop  # Not available on Windows
+    except ImportError:
+        asyncio.run(add_initial_users())
+    else:
+        uvloop.run(add_initial_users())
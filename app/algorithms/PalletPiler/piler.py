@@ -1,17 +1,56 @@
+from collections import OrderedDict
+
 from ortools.sat.python import cp_model
-import json
 import os
 
+# CP-SAT search workers per solve: one per core unless PILER_SEARCH_WORKERS
+# is set. Lowered in pool processes so that concurrent solves share the
+# machine instead of oversubscribing it.
+_num_search_workers = int(os.getenv("PILER_SEARCH_WORKERS", os.cpu_count() or 8))
+# Set PILER_LOG_SEARCH=true to print CP-SAT's search log when tuning
+_LOG_SEARCH = os.getenv("PILER_LOG_SEARCH", "false").lower() == "true"
+# Stop once the best layout is provably within this fraction of optimal.
+# Off by default, so an OPTIMAL status means a proven optimum. Deployments
+# that prefer faster solves can opt in (e.g. 1e-4): packed volume is weighted
+# x1000, so that gap only gives up fine tuning of the penalty terms, but
+# CP-SAT then reports OPTIMAL for layouts that are merely within the gap.
+_RELATIVE_GAP_LIMIT = float(os.getenv("PILER_RELATIVE_GAP_LIMIT", "0"))
+
+
+def set_search_workers(count):
+    global _num_search_workers
+    _num_search_workers = max(1, count)
+
+
+# Boxes taller than this multiple of their base width would topple
+MAX_H_TO_BASE_RATIO = 3.0
+
+
+# The six ways a box can sit, as permutations of its (w, d, h). Pairs share
+# the same face down: 0-1 upright, 2-3 tipped onto w, 4-5 tipped onto d;
+# the second of each pair is spun a quarter turn.
+ORIENTATIONS = ((0, 1, 2), (1, 0, 2), (2, 1, 0), (1, 2, 0), (0, 2, 1), (2, 0, 1))
+
+
+def _oriented_dims(item):
+    """(w, d, h) of the item in each of the six ORIENTATIONS."""
+    return [tuple(item.dims[axis] for axis in orientation) for orientation in ORIENTATIONS]
+
+
 # --- 1. DATA STRUCTURE ---
 class Item:
+    # No per-instance __dict__: orders can hold many items
+    __slots__ = ('id', 'name', 'w', 'd', 'h', 'dims', 'weight', 'volume',
+                 'picking_order', 'allow_tipping', 'is_fragile', 'location', 'type_id')
+
     # UPDATED: Added type_id and location as optional arguments
     def __init__(self, id, name, w, d, h, weight, picking_order=1, allow_tipping=True, is_fragile=False, type_id=None, location=""):
-        self.id = str(id)
+        self.id = id if isinstance(id, str) else str(id)
         self.name = name
         self.w = w
         self.d = d
         self.h = h
-        self.dims = [w, d, h]
+        self.dims = (w, d, h)
         
         self.weight = weight 
         self.volume = w * d * h
@@ -28,18 +67,78 @@ class Item:
             # Fallback: Split by the LAST dash to remove the index (e.g. "SKU-1" -> "SKU")
             self.type_id = self.id.rsplit('-', 1)[0] if '-' in self.id else self.id
 
-# --- 2. CORE SOLVER LOGIC ---
-def solve_single_pallet(items, pallet_w, pallet_d, pallet_h, 
-                        gravity_weight=150, 
-                        corner_weight=2, 
-                        clustering_weight=1, 
-                        max_z_penalty=4580,
-                        location_weight=200):
-    
+# --- 2. GREEDY WARM START ---
+def greedy_pack(items, pallet_w, pallet_d, pallet_h, max_h_to_base_ratio=MAX_H_TO_BASE_RATIO):
+    """
+    Quick shelf packer used to seed the CP-SAT search.
+
+    Items go upright in rows across the pallet, largest footprint first.
+    Once the floor is full, an item is stacked on the lowest free box whose
+    top covers its whole footprint, one item per base, so every placement
+    respects the picking order, fragile and support rules of the full model.
+
+    Returns {item index: (x, y, z, spin)} for the items that fit.
+    """
+    placements = {}
+    order = sorted(range(len(items)), key=lambda i: -(items[i].w * items[i].d))
+    row_y, row_depth, cursor_x = 0, 0, 0
+    # Boxes with a free top: (top z, y, x, w, d, item index)
+    bases = []
+
+    for i in order:
+        item = items[i]
+        w, d, h = item.dims
+        if h > min(w, d) * max_h_to_base_ratio or h > pallet_h:
+            continue  # Not allowed upright
+
+        placed = None
+        for spin, (fw, fd) in ((0, (w, d)), (1, (d, w))):
+            if cursor_x + fw <= pallet_w and row_y + fd <= pallet_d:
+                # Fits in the current row
+                placed = (cursor_x, row_y, 0, spin, fw, fd)
+                cursor_x += fw
+                row_depth = max(row_depth, fd)
+                break
+            if fw <= pallet_w and row_y + row_depth + fd <= pallet_d:
+                # Start a new row behind the current one
+                row_y, row_depth, cursor_x = row_y + row_depth, fd, fw
+                placed = (0, row_y, 0, spin, fw, fd)
+                break
+
+        if placed is None:
+            # Floor is full: rest the item on the lowest base that can carry it
+            for b, (top, by, bx, bw, bd, base) in enumerate(bases):
+                if (top + h > pallet_h or items[base].is_fragile
+                        or item.picking_order < items[base].picking_order):
+                    continue
+                spin = 0 if w <= bw and d <= bd else 1 if d <= bw and w <= bd else None
+                if spin is not None:
+                    placed = (bx, by, top, spin) + ((w, d) if spin == 0 else (d, w))
+                    del bases[b]
+                    break
+            if placed is None:
+                continue
+
+        px, py, pz, spin, fw, fd = placed
+        placements[i] = (px, py, pz, spin)
+        bases.append((pz + h, py, px, fw, fd, i))
+        bases.sort()
+
+    return placements
+
+
+# --- 3. CORE SOLVER LOGIC ---
+def _solve_placements(items, pallet_w, pallet_d, pallet_h, gravity_weight,
+                      corner_weight, clustering_weight, max_z_penalty, location_weight):
+    """
+    Build and solve the CP-SAT model for one pallet.
+
+    Returns (status, placements, unpacked_indices) where placements are
+    (index, x, y, z, w, d, h, tipped) tuples sorted bottom-up.
+    """
     model = cp_model.CpModel()
 
     # --- CONSTANTS ---
-    MAX_H_TO_BASE_RATIO = 3.0 
     OVERHANG_RATIO = 5 
     GAP_FILL_PENALTY = 10000   # Heavy cost to tip a box; solver only tips to fill gaps
     SAME_TYPE_STACKING_PENALTY = 1000 
@@ -50,53 +149,78 @@ def solve_single_pallet(items, pallet_w, pallet_d, pallet_h,
     y = {}
     z = {}
     orientation = {} 
-    spin = {}
     
     current_w = {}
     current_d = {}
     current_h = {}
     current_area = {} 
+    z_interval = {}
+    tol_w = {}
+    tol_d = {}
+
+    # Orientations each item may actually use: upright only when it cannot
+    # tip, and never a face that is too tall for its base
+    usable_dims = [
+        [dims for k, dims in enumerate(_oriented_dims(item))
+         if (item.allow_tipping or k < 2)
+         and dims[2] <= min(dims[0], dims[1]) * MAX_H_TO_BASE_RATIO]
+        for item in items
+    ]
 
-    max_z = model.NewIntVar(0, pallet_h, 'max_z')
+    # No load can be taller than all items stacked at their tallest
+    stack_height = sum(max((dims[2] for dims in usable), default=0) for usable in usable_dims)
+    max_z = model.NewIntVar(0, min(pallet_h, stack_height), 'max_z')
+
+    # Objective terms as parallel variable / coefficient lists, so the
+    # whole objective goes to the solver as one weighted sum
+    objective_vars = []
+    objective_coefs = []
 
     # Clustering Helpers
     last_seen_index_by_name = {}
-    total_clustering_dist = 0
-    total_stacking_penalty = 0
     gap_fill = {}
 
     for i, item in enumerate(items):
         is_packed[i] = model.NewBoolVar(f'is_packed_{i}')
-        x[i] = model.NewIntVar(0, pallet_w, f'x_{i}')
-        y[i] = model.NewIntVar(0, pallet_d, f'y_{i}')
-        z[i] = model.NewIntVar(0, pallet_h, f'z_{i}')
-        spin[i] = model.NewBoolVar(f'spin_{i}')
+
+        # A box can never start closer to the far edge than its smallest
+        # extent over the orientations it may use
+        usable = usable_dims[i]
+        min_w, min_d, min_h = (min(axis) for axis in zip(*usable)) if usable else (0, 0, 0)
+        x[i] = model.NewIntVar(0, max(0, pallet_w - min_w), f'x_{i}')
+        y[i] = model.NewIntVar(0, max(0, pallet_d - min_d), f'y_{i}')
+        z[i] = model.NewIntVar(0, max(0, pallet_h - min_h), f'z_{i}')
         
-        orientation[i] = [model.NewBoolVar(f'orient_{i}_{k}') for k in range(3)]
-        model.Add(sum(orientation[i]) == 1).OnlyEnforceIf(is_packed[i])
+        # One Bool per physical orientation, see ORIENTATIONS
+        orientation[i] = [model.NewBoolVar(f'orient_{i}_{k}') for k in range(len(ORIENTATIONS))]
+        model.AddAtMostOne(orientation[i])
+        model.AddExactlyOne(orientation[i]).OnlyEnforceIf(is_packed[i])
+        upright = orientation[i][:2]
         
         # --- UPRIGHT-FIRST CONSTRAINT ---
-        # All boxes stay upright (orientation[0]) by default.
-        # Tipping (orientation[1] or [2]) is only unlocked via gap_fill,
+        # All boxes stay upright (orientation 0 or 1) by default.
+        # Tipping (orientation 2-5) is only unlocked via gap_fill,
         # which carries a heavy penalty so the solver only tips to fill gaps.
         if item.allow_tipping:
             gap_fill[i] = model.NewBoolVar(f'gap_fill_{i}')
-            model.Add(orientation[i][0] == 1).OnlyEnforceIf(gap_fill[i].Not())
+            model.AddBoolOr(upright).OnlyEnforceIf(gap_fill[i].Not())
             model.AddImplication(gap_fill[i], is_packed[i])
         else:
             # Items that must never tip — always upright, gap_fill disabled
-            model.Add(orientation[i][0] == 1)
+            model.AddBoolOr(upright)
             gap_fill[i] = None
 
         # --- PHYSICS CHECKS ---
-        w, d, h = item.dims
-        if h > min(w, d) * MAX_H_TO_BASE_RATIO:
-            model.Add(orientation[i][0] == 0)
-        if item.allow_tipping:
-            if w > min(h, d) * MAX_H_TO_BASE_RATIO:
-                model.Add(orientation[i][1] == 0)
-            if d > min(w, h) * MAX_H_TO_BASE_RATIO:
-                model.Add(orientation[i][2] == 0)
+        # Faces whose height is too tall for their base are never used
+        for k, (fw, fd, fh) in enumerate(_oriented_dims(item)):
+            if fh > min(fw, fd) * MAX_H_TO_BASE_RATIO:
+                model.Add(orientation[i][k] == 0)
+
+            # --- SQUARE FOOTPRINTS ---
+            # Spinning a square footprint gives the same placement, so the
+            # spun variant is dropped instead of letting the solver branch on it
+            if k % 2 == 1 and fw == fd:
+                model.Add(orientation[i][k] == 0)
 
         # --- CLUSTERING LOGIC ---
         if item.name in last_seen_index_by_name:
@@ -113,55 +237,99 @@ def solve_single_pallet(items, pallet_w, pallet_d, pallet_h,
             model.Add(c_dz >= z[i] - z[prev_i]).OnlyEnforceIf([is_packed[i], is_packed[prev_i]])
             model.Add(c_dz >= z[prev_i] - z[i]).OnlyEnforceIf([is_packed[i], is_packed[prev_i]])
             
-            total_clustering_dist += (c_dx + c_dy + (c_dz * 4))
+            objective_vars += [c_dx, c_dy, c_dz]
+            objective_coefs += [-clustering_weight, -clustering_weight, -4 * clustering_weight]
             
         last_seen_index_by_name[item.name] = i
 
     # --- DIMENSION MAPPING ---
     for i, item in enumerate(items):
         w, d, h = item.dims
-        max_dim = max(w, d, h)
-        current_w[i] = model.NewIntVar(0, max_dim, f'cw_{i}')
-        current_d[i] = model.NewIntVar(0, max_dim, f'cd_{i}')
-        current_h[i] = model.NewIntVar(0, max_dim, f'ch_{i}')
-        areas = [w*d, h*d, w*h]
-        current_area[i] = model.NewIntVar(min(areas), max(areas), f'area_{i}')
-
-        # Orientations
-        model.Add(current_w[i] == w).OnlyEnforceIf([orientation[i][0], spin[i].Not()])
-        model.Add(current_d[i] == d).OnlyEnforceIf([orientation[i][0], spin[i].Not()])
-        model.Add(current_w[i] == d).OnlyEnforceIf([orientation[i][0], spin[i]])
-        model.Add(current_d[i] == w).OnlyEnforceIf([orientation[i][0], spin[i]])
-        model.Add(current_h[i] == h).OnlyEnforceIf(orientation[i][0])
-        model.Add(current_area[i] == w*d).OnlyEnforceIf(orientation[i][0])
-
-        model.Add(current_w[i] == h).OnlyEnforceIf([orientation[i][1], spin[i].Not()])
-        model.Add(current_d[i] == d).OnlyEnforceIf([orientation[i][1], spin[i].Not()])
-        model.Add(current_w[i] == d).OnlyEnforceIf([orientation[i][1], spin[i]])
-        model.Add(current_d[i] == h).OnlyEnforceIf([orientation[i][1], spin[i]])
-        model.Add(current_h[i] == w).OnlyEnforceIf(orientation[i][1])
-        model.Add(current_area[i] == h*d).OnlyEnforceIf(orientation[i][1])
-
-        model.Add(current_w[i] == w).OnlyEnforceIf([orientation[i][2], spin[i].Not()])
-        model.Add(current_d[i] == h).OnlyEnforceIf([orientation[i][2], spin[i].Not()])
-        model.Add(current_w[i] == h).OnlyEnforceIf([orientation[i][2], spin[i]])
-        model.Add(current_d[i] == w).OnlyEnforceIf([orientation[i][2], spin[i]])
-        model.Add(current_h[i] == d).OnlyEnforceIf(orientation[i][2])
-        model.Add(current_area[i] == w*h).OnlyEnforceIf(orientation[i][2])
+        # Domains hold only the values an orientation can produce
+        dims = cp_model.Domain.FromValues([w, d, h])
+        current_w[i] = model.NewIntVarFromDomain(dims, f'cw_{i}')
+        current_d[i] = model.NewIntVarFromDomain(dims, f'cd_{i}')
+        current_h[i] = model.NewIntVarFromDomain(dims, f'ch_{i}')
+        current_area[i] = model.NewIntVarFromDomain(cp_model.Domain.FromValues([w*d, h*d, w*h]), f'area_{i}')
+
+        # Orientations: the index of the chosen orientation Bool selects
+        # (w, d, h, area) from a table instead of reified equalities
+        placements = _oriented_dims(item)
+        rotation = model.NewIntVar(0, len(placements) - 1, f'rot_{i}')
+        model.Add(rotation == sum(k * orientation[i][k] for k in range(len(placements))))
+        model.AddElement(rotation, [p[0] for p in placements], current_w[i])
+        model.AddElement(rotation, [p[1] for p in placements], current_d[i])
+        model.AddElement(rotation, [p[2] for p in placements], current_h[i])
+        model.AddElement(rotation, [p[0] * p[1] for p in placements], current_area[i])
+        # Allowed overhang when resting on another box, one per item
+        tol_w[i] = model.NewIntVar(0, pallet_w, f'tol_w_{i}')
+        tol_d[i] = model.NewIntVar(0, pallet_d, f'tol_d_{i}')
+        model.AddElement(rotation, [p[0] * OVERHANG_RATIO // 100 for p in placements], tol_w[i])
+        model.AddElement(rotation, [p[1] * OVERHANG_RATIO // 100 for p in placements], tol_d[i])
+
+        # Vertical extent of the box, used by the layer-area constraint below.
+        # The domain of z_end also keeps a packed box under the pallet height.
+        z_end = model.NewIntVar(0, pallet_h, f'z_end_{i}')
+        z_interval[i] = model.NewOptionalIntervalVar(z[i], current_h[i], z_end, is_packed[i], f'z_iv_{i}')
 
         # Boundaries
         model.Add(x[i] + current_w[i] <= pallet_w).OnlyEnforceIf(is_packed[i])
         model.Add(y[i] + current_d[i] <= pallet_d).OnlyEnforceIf(is_packed[i])
-        model.Add(z[i] + current_h[i] <= pallet_h).OnlyEnforceIf(is_packed[i])
         model.Add(max_z >= z[i] + current_h[i]).OnlyEnforceIf(is_packed[i])
 
+    # --- LAYER AREA ---
+    # Redundant with the pairwise disjunctions below, but propagates much
+    # earlier: at any height the footprints of the boxes crossing it cannot
+    # exceed the pallet area. (A plain NoOverlap2D on x/y would forbid
+    # stacking, so the 3D disjunction stays.)
+    model.AddCumulative(list(z_interval.values()), list(current_area.values()), pallet_w * pallet_d)
+
     # --- COLLISION & SUPPORT ---
-    for i in range(len(items)):
-        supported_by = []  # Initialize support list for each item
+    # Pair rules depend only on item attributes, so they are evaluated once
+    # up front. can_stack[i][j]: i may rest above j. Items picked first
+    # (lower picking_order) must stay below, and nothing goes on a fragile item.
+    picking = [item.picking_order for item in items]
+    fragile = [item.is_fragile for item in items]
+    type_ids = [item.type_id for item in items]
+    can_stack = [
+        [picking[i] >= picking[j] and not fragile[j] for j in range(len(items))]
+        for i in range(len(items))
+    ]
+
+    def may_rest_on(top, base):
+        """Whether any usable orientations let `top` sit on `base` within tolerance."""
+        if not can_stack[top][base]:
+            return False
+        return any(
+            tw <= bw + 2 * (tw * OVERHANG_RATIO // 100)
+            and td <= bd + 2 * (td * OVERHANG_RATIO // 100)
+            and th + bh <= pallet_h
+            for tw, td, th in usable_dims[top]
+            for bw, bd, bh in usable_dims[base]
+        )
+
+    def add_support(top, base, resting_above):
+        """Bool that is true when `top` rests on `base` within the overhang tolerance."""
+        x_supported = model.NewBoolVar(f'{top}_x_sup_{base}')
+        y_supported = model.NewBoolVar(f'{top}_y_sup_{base}')
+
+        model.Add(x[top] >= x[base] - tol_w[top]).OnlyEnforceIf(x_supported)
+        model.Add(x[top] + current_w[top] <= x[base] + current_w[base] + tol_w[top]).OnlyEnforceIf(x_supported)
+        model.Add(y[top] >= y[base] - tol_d[top]).OnlyEnforceIf(y_supported)
+        model.Add(y[top] + current_d[top] <= y[base] + current_d[base] + tol_d[top]).OnlyEnforceIf(y_supported)
         
-        for j in range(len(items)):
-            if i == j: continue
+        is_valid_base = model.NewBoolVar(f'{top}_on_{base}')
+        model.AddBoolAnd([resting_above, x_supported, y_supported]).OnlyEnforceIf(is_valid_base)
+        model.Add(z[top] == z[base] + current_h[base]).OnlyEnforceIf(is_valid_base)
+        # Prevent Ghost Supports: if is_valid_base is true, then the base must be packed
+        model.AddImplication(is_valid_base, is_packed[base])
+        return is_valid_base
 
+    # Each unordered pair is visited once; the relations of (j, i) are the
+    # mirror images of (i, j), e.g. "j above i" is "i below j".
+    supported_by = {i: [] for i in range(len(items))}
+    for i in range(len(items)):
+        for j in range(i + 1, len(items)):
             left = model.NewBoolVar(f'{i}_left_{j}')
             right = model.NewBoolVar(f'{i}_right_{j}')
             behind = model.NewBoolVar(f'{i}_behind_{j}')
@@ -178,128 +346,192 @@ def solve_single_pallet(items, pallet_w, pallet_d, pallet_h,
 
             model.AddBoolOr([left, right, behind, front, below, above]).OnlyEnforceIf([is_packed[i], is_packed[j]])
 
-            # Location ordering: items picked first (lower picking_order) must stay below
-            if items[i].picking_order < items[j].picking_order:
-                model.Add(above == False)
-            elif items[i].picking_order > items[j].picking_order:
-                model.Add(below == False)
-            
-            # Fragile Rule
-            if items[j].is_fragile:
+            # Location ordering and fragile rule
+            if not can_stack[i][j]:
                 model.Add(above == False)
-            if items[i].is_fragile:
+            if not can_stack[j][i]:
                 model.Add(below == False)
 
             # --- TOWER PREVENTION (FIXED) ---
             # Now that type_id is correct, this will correctly penalize stacking "Winter Jacket" on "Winter Jacket"
-            if items[i].type_id == items[j].type_id:
-                 i_stacked_on_j = model.NewBoolVar(f'{i}_stack_{j}')
-                 model.Add(above == True).OnlyEnforceIf(i_stacked_on_j)
-                 model.Add(above == False).OnlyEnforceIf(i_stacked_on_j.Not())
-                 total_stacking_penalty += i_stacked_on_j
-
-            # Support Logic
-            x_supported = model.NewBoolVar(f'{i}_x_sup_{j}')
-            y_supported = model.NewBoolVar(f'{i}_y_sup_{j}')
-            
-            tol_w = model.NewIntVar(0, pallet_w, f'tol_w_{i}')
-            tol_d = model.NewIntVar(0, pallet_d, f'tol_d_{i}')
-            model.AddDivisionEquality(tol_w, current_w[i] * OVERHANG_RATIO, 100)
-            model.AddDivisionEquality(tol_d, current_d[i] * OVERHANG_RATIO, 100)
-
-            model.Add(x[i] >= x[j] - tol_w).OnlyEnforceIf(x_supported)
-            model.Add(x[i] + current_w[i] <= x[j] + current_w[j] + tol_w).OnlyEnforceIf(x_supported)
-            model.Add(y[i] >= y[j] - tol_d).OnlyEnforceIf(y_supported)
-            model.Add(y[i] + current_d[i] <= y[j] + current_d[j] + tol_d).OnlyEnforceIf(y_supported)
-            
-            is_valid_base = model.NewBoolVar(f'{i}_on_{j}')
-            model.AddBoolAnd([above, x_supported, y_supported]).OnlyEnforceIf(is_valid_base)
-            model.Add(z[i] == z[j] + current_h[j]).OnlyEnforceIf(is_valid_base)
-            # Prevent Ghost Supports: if is_valid_base is true, then is_packed[j] must be true
-            model.AddImplication(is_valid_base, is_packed[j])
-            
-            supported_by.append(is_valid_base)
+            # (i on j and j on i, in either direction)
+            if type_ids[i] == type_ids[j]:
+                objective_vars += [above, below]
+                objective_coefs += [-SAME_TYPE_STACKING_PENALTY, -SAME_TYPE_STACKING_PENALTY]
 
+            # Support Logic: only for pairs where one box can carry the other
+            if may_rest_on(i, j):
+                supported_by[i].append(add_support(i, j, above))
+            if may_rest_on(j, i):
+                supported_by[j].append(add_support(j, i, below))
+
+    for i in range(len(items)):
         on_ground = model.NewBoolVar(f'{i}_on_ground')
         model.Add(z[i] == 0).OnlyEnforceIf(on_ground)
-        model.AddBoolOr([on_ground] + supported_by).OnlyEnforceIf(is_packed[i])
+        model.AddBoolOr([on_ground] + supported_by[i]).OnlyEnforceIf(is_packed[i])
 
     # --- OBJECTIVE FUNCTION ---
-    volume_score = 0
-    gravity_score = 0
-    corner_score = 0
-    gap_fill_total = 0
-    location_order_score = 0
-    
     max_picking_order = max((item.picking_order for item in items), default=1)
+
+    objective_vars.append(max_z)
+    objective_coefs.append(-max_z_penalty)
     
     for i, item in enumerate(items):
-        volume_score += (is_packed[i] * item.volume)
-        gravity_score += (z[i] * gravity_weight) 
-        corner_score += (x[i] + y[i]) 
+        # Packed volume dominates, corners pull boxes towards (0, 0)
+        objective_vars += [is_packed[i], x[i], y[i]]
+        objective_coefs += [item.volume * 1000, -corner_weight, -corner_weight]
 
         # Count gap-fill tipping (only for items that allow tipping)
         if gap_fill[i] is not None:
-            gap_fill_total += gap_fill[i]
+            objective_vars.append(gap_fill[i])
+            objective_coefs.append(-GAP_FILL_PENALTY)
         
         # Items picked first (lower picking_order) get a stronger penalty for being high up.
         # This encourages them to spread out horizontally and form a stable base.
+        # Folded together with gravity into a single weight per z.
         order_factor = max_picking_order - item.picking_order + 1
-        location_order_score += z[i] * order_factor
-
-    model.Maximize(
-        (volume_score * 1000) 
-        - (max_z * max_z_penalty) 
-        - gravity_score 
-        - (corner_score * corner_weight) 
-        - (gap_fill_total * GAP_FILL_PENALTY)
-        - (total_clustering_dist * clustering_weight)
-        - (total_stacking_penalty * SAME_TYPE_STACKING_PENALTY) 
-        - (location_order_score * location_weight)
-    )
+        objective_vars.append(z[i])
+        objective_coefs.append(-(gravity_weight + order_factor * location_weight))
+
+    model.Maximize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coefs))
+
+    # --- WARM START ---
+    hints = greedy_pack(items, pallet_w, pallet_d, pallet_h, MAX_H_TO_BASE_RATIO)
+    for i in range(len(items)):
+        placed = hints.get(i)
+        model.AddHint(is_packed[i], placed is not None)
+        if placed is None:
+            continue
+        hx, hy, hz, hspin = placed
+        model.AddHint(x[i], hx)
+        model.AddHint(y[i], hy)
+        model.AddHint(z[i], hz)
+        for k in range(len(ORIENTATIONS)):
+            model.AddHint(orientation[i][k], k == hspin)
+        if gap_fill[i] is not None:
+            model.AddHint(gap_fill[i], False)
 
     # --- SOLVE ---
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 20.0 
-    solver.parameters.num_search_workers = 8 
+    # Small residual loads are settled in a few seconds; only large ones
+    # get the full 20s budget
+    solver.parameters.max_time_in_seconds = min(20.0, 5.0 + 0.5 * len(items))
+    solver.parameters.num_search_workers = _num_search_workers
+    solver.parameters.log_search_progress = _LOG_SEARCH
+    solver.parameters.relative_gap_limit = _RELATIVE_GAP_LIMIT
     
     status = solver.Solve(model)
 
-    packed_items_data = []
+    placements = []
     unpacked_indices = []
     
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for i, item in enumerate(items):
+        for i in range(len(items)):
             if solver.BooleanValue(is_packed[i]):
-                packed_items_data.append({
-                    "id": item.id,
-                    "name": item.name,
-                    "type_id": item.type_id,
-                    "location": item.location,
-                    "picking_order": item.picking_order,
-                    "x": solver.Value(x[i]),
-                    "y": solver.Value(y[i]),
-                    "z": solver.Value(z[i]),
-                    "w": solver.Value(current_w[i]), 
-                    "h": solver.Value(current_h[i]), 
-                    "d": solver.Value(current_d[i]), 
-                    "weight": item.weight,
-                    "tipped": not (solver.BooleanValue(orientation[i][0])) 
-                })
+                placements.append((
+                    i,
+                    solver.Value(x[i]),
+                    solver.Value(y[i]),
+                    solver.Value(z[i]),
+                    solver.Value(current_w[i]),
+                    solver.Value(current_d[i]),
+                    solver.Value(current_h[i]),
+                    not any(solver.BooleanValue(o) for o in orientation[i][:2]),
+                ))
             else:
                 unpacked_indices.append(i)
                 
-        packed_items_data.sort(key=lambda item: (item['z'], item['y'], item['x']))
+        placements.sort(key=lambda p: (p[3], p[2], p[1]))
         
     else:
         unpacked_indices = list(range(len(items)))
     
+    return status, tuple(placements), tuple(unpacked_indices)
+
+
+def _fits_empty_pallet(item, pallet_w, pallet_d, pallet_h):
+    """True if some orientation the model allows fits inside the pallet."""
+    # Spun variants are part of the list, so both footprint rotations are tried
+    orientations = _oriented_dims(item)
+    if not item.allow_tipping:
+        orientations = orientations[:2]
+    return any(
+        fw <= pallet_w and fd <= pallet_d and fh <= pallet_h and fh <= min(fw, fd) * MAX_H_TO_BASE_RATIO
+        for fw, fd, fh in orientations
+    )
+
+
+def _item_signature(item):
+    """Everything the model reads from an item (ids and locations are not)."""
+    return (item.name, item.w, item.d, item.h, item.weight, item.picking_order,
+            item.allow_tipping, item.is_fragile, item.type_id)
+
+
+# Recent solver results, keyed by item signatures, pallet size and weights
+_SOLVE_CACHE = OrderedDict()
+_SOLVE_CACHE_SIZE = 256
+
+
+def _solve_cached(items, *args):
+    key = (tuple(_item_signature(item) for item in items), *args)
+    if key in _SOLVE_CACHE:
+        _SOLVE_CACHE.move_to_end(key)
+        return _SOLVE_CACHE[key]
+
+    status, placements, unpacked_indices = _solve_placements(items, *args)
+    result = (placements, unpacked_indices)
+    # A timeout without any solution says nothing about the next attempt
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        _SOLVE_CACHE[key] = result
+        if len(_SOLVE_CACHE) > _SOLVE_CACHE_SIZE:
+            _SOLVE_CACHE.popitem(last=False)
+    return result
+
+
+def solve_single_pallet(items, pallet_w, pallet_d, pallet_h, 
+                        gravity_weight=150, 
+                        corner_weight=2, 
+                        clustering_weight=1, 
+                        max_z_penalty=4580,
+                        location_weight=200):
+    # Items that cannot fit even an empty pallet stay out of the model
+    viable = [i for i, item in enumerate(items) if _fits_empty_pallet(item, pallet_w, pallet_d, pallet_h)]
+
+    # Identical item lists (e.g. a re-run of the same order) reuse the
+    # previous solve instead of spending the whole solver time budget again
+    placements, _ = _solve_cached(
+        [items[i] for i in viable], pallet_w, pallet_d, pallet_h,
+        gravity_weight, corner_weight, clustering_weight, max_z_penalty, location_weight,
+    )
+
+    packed_items_data = [
+        {
+            "id": item.id,
+            "name": item.name,
+            "type_id": item.type_id,
+            "location": item.location,
+            "picking_order": item.picking_order,
+            "x": px,
+            "y": py,
+            "z": pz,
+            "w": pw, 
+            "h": ph, 
+            "d": pd, 
+            "weight": item.weight,
+            "tipped": tipped
+        }
+        for k, px, py, pz, pw, pd, ph, tipped in placements
+        for item in (items[viable[k]],)
+    ]
+    
+    packed = {viable[k] for k, *_ in placements}
+    unpacked_indices = [i for i in range(len(items)) if i not in packed]
     return packed_items_data, unpacked_indices
 
 def solve_multiple_pallets(items, pallet_w, pallet_d, pallet_h, **kwargs):
     all_pallets = []
-    items.sort(key=lambda x: (x.picking_order, -(x.w * x.d), x.name))
-    remaining_items = items.copy()
+    # sorted() builds the working list in one pass and leaves the caller's list alone
+    remaining_items = sorted(items, key=lambda x: (x.picking_order, -(x.w * x.d), x.name))
     pallet_number = 1
     
     while len(remaining_items) > 0:
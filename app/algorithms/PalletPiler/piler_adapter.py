@@ -1,17 +1,53 @@
 import asyncio
-import json
 import logging
-from sqlmodel import Session, select
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from . import piler
 from app.models.models import OrderLine, Product, Order, OrderStatus, Inventory, Location
-from app.db import engine
+from app.db import AsyncSessionLocal
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Solves run in worker processes so they neither block the event loop nor
+# queue behind each other. Each CP-SAT solve already uses several threads,
+# so the pool only gets one process per 8 cores.
+_solver_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _solver_pool_size() -> int:
+    return max(1, (os.cpu_count() or 1) // 8)
+
+
+def _get_solver_pool() -> ProcessPoolExecutor:
+    global _solver_pool
+    if _solver_pool is None:
+        cpu_count = os.cpu_count() or 1
+        pool_size = _solver_pool_size()
+        _solver_pool = ProcessPoolExecutor(
+            max_workers=pool_size,
+            # CP-SAT runs its own threads; forking a threaded process is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=piler.set_search_workers,
+            initargs=(cpu_count // pool_size,),
+        )
+    return _solver_pool
+
+
+def shutdown_solver_pool():
+    """Stop the solver worker processes. Call on application shutdown."""
+    global _solver_pool
+    if _solver_pool is not None:
+        _solver_pool.shutdown(cancel_futures=True)
+        _solver_pool = None
+
+
 async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]:
     """
     Process a single order through the packing algorithm.
@@ -32,10 +68,24 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
         
         logger.info(f"Processing Order #{order.order_number} (ID: {order_id})")
         
-        # Get order lines
-        lines_stmt = select(OrderLine).where(OrderLine.order_id == order.order_id)
+        # Get order lines with their products and warehouse location in one
+        # round trip. A product stored in several places uses its first
+        # inventory row, so each line still yields exactly one result row.
+        location_code_stmt = (
+            select(Location.location_code)
+            .join(Inventory, Inventory.location_id == Location.location_id)
+            .where(Inventory.product_id == OrderLine.product_id)
+            .order_by(Inventory.inventory_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        lines_stmt = (
+            select(OrderLine, Product, location_code_stmt)
+            .outerjoin(Product, OrderLine.product_id == Product.product_id)
+            .where(OrderLine.order_id == order.order_id)
+        )
         lines_result = await db.execute(lines_stmt)
-        order_lines = lines_result.scalars().all()
+        order_lines = lines_result.all()
         
         logger.info(f"  Items in order: {len(order_lines)}")
         
@@ -43,45 +93,41 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
             logger.warning(f"Order {order.order_number} has no order lines")
             return None
         
-        # Build items list for packing algorithm
-        all_items = []
-        for line in order_lines:
-            product_stmt = select(Product).where(Product.product_id == line.product_id)
-            product_result = await db.execute(product_stmt)
-            product = product_result.scalar_one_or_none()
-            
+        packable_lines = []
+        for line, product, location_code in order_lines:
             if not product:
                 logger.error(f"Product {line.product_id} not found")
                 continue
+            packable_lines.append((line, product, location_code or ""))
+        
+        # Assign picking_order based on warehouse location (A-01-01 = bottom, higher = top).
+        # Ranked once per line, so every item gets its order when it is created.
+        unique_locations = sorted({loc for line, _, loc in packable_lines if line.quantity_ordered > 0})
+        location_to_order = {loc: idx + 1 for idx, loc in enumerate(unique_locations)}
+        
+        # Build items list for packing algorithm
+        all_items = []
+        for line, product, location_code in packable_lines:
+            picking_order = location_to_order.get(location_code, 1)
             
-            # Look up the warehouse location for this product
-            inv_stmt = select(Inventory).where(Inventory.product_id == product.product_id)
-            inv_result = await db.execute(inv_stmt)
-            inventory = inv_result.scalar_one_or_none()
-            
-            location_code = ""
-            if inventory:
-                loc_stmt = select(Location).where(Location.location_id == inventory.location_id)
-                loc_result = await db.execute(loc_stmt)
-                loc = loc_result.scalar_one_or_none()
-                if loc:
-                    location_code = loc.location_code
-            
-            # Create piler items for each quantity
-            for i in range(line.quantity_ordered):
-                item = piler.Item(
-                    id=f"{product.sku}-{i}",
-                    name=product.name,
-                    w=int(product.width_cm),
-                    d=int(product.length_cm),
-                    h=int(product.height_cm),
-                    weight=float(product.weight_kg),
-                    allow_tipping=not product.requires_upright,
-                    is_fragile=product.is_fragile,
-                    type_id=product.sku,
-                    location=location_code
-                )
-                all_items.append(item)
+            # Create piler items for each quantity; the product's values are
+            # converted once per line, not once per unit
+            item_kwargs = dict(
+                name=product.name,
+                w=int(product.width_cm),
+                d=int(product.length_cm),
+                h=int(product.height_cm),
+                weight=float(product.weight_kg),
+                picking_order=picking_order,
+                allow_tipping=not product.requires_upright,
+                is_fragile=product.is_fragile,
+                type_id=product.sku,
+                location=location_code
+            )
+            all_items.extend(
+                piler.Item(id=f"{product.sku}-{i}", **item_kwargs)
+                for i in range(line.quantity_ordered)
+            )
             
             logger.info(f"   - Added {line.quantity_ordered}x {product.name}")
         
@@ -89,12 +135,6 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
             logger.error(f"No items to pack for order {order.order_number}")
             return None
         
-        # Assign picking_order based on warehouse location (A-01-01 = bottom, higher = top)
-        unique_locations = sorted(set(item.location for item in all_items))
-        location_to_order = {loc: idx + 1 for idx, loc in enumerate(unique_locations)}
-        for item in all_items:
-            item.picking_order = location_to_order.get(item.location, 1)
-        
         total_items = len(all_items)
         logger.info(f"  Total items to pack: {total_items}")
         
@@ -104,7 +144,10 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
         pallet_D = 120  
         
         logger.info(f"  Starting packing algorithm with {total_items} items...")
-        pallet_instruction_json = piler.solve_multiple_pallets(all_items, pallet_W, pallet_D, pallet_H)
+        loop = asyncio.get_running_loop()
+        pallet_instruction_json = await loop.run_in_executor(
+            _get_solver_pool(), piler.solve_multiple_pallets, all_items, pallet_W, pallet_D, pallet_H
+        )
         
         # Save results to file
         script_dir = Path(__file__).parent
@@ -112,8 +155,9 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
         output_dir.mkdir(parents=True, exist_ok=True)
         
         filename = output_dir / f"pallet_instructions_{order.order_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(filename, 'w') as f:
-            json.dump(pallet_instruction_json, f, indent=2)
+        # Compact output is all the pallet-instructions endpoint needs; the
+        # write runs in a thread so other orders keep making progress
+        await asyncio.to_thread(filename.write_bytes, orjson.dumps(pallet_instruction_json))
         
         logger.info(f"Successfully saved pallet instructions: {filename.name}")
         
@@ -132,99 +176,34 @@ async def process_single_order(order_id: int, db: AsyncSession) -> Optional[str]
 
 async def process_all_new_orders():
     """Process all orders with NEW status."""
-    async with engine.begin() as conn:
-        def process_orders(sync_conn):
-            with Session(bind=sync_conn) as session:
-                
-                # Get ALL orders with NEW status
-                statement = select(Order).where(Order.status == OrderStatus.NEW)
-                orders = session.exec(statement).all()
-                
-                print(f"Found {len(orders)} orders to process\n")
-                
-                if not orders:
-                    print("No orders found with NEW status")
-                    return
-                
-                # Process each order
-                for order in orders:
-                    print(f"Processing Order #{order.order_number}")
-                    
-                    order_lines = session.exec(
-                        select(OrderLine).where(OrderLine.order_id == order.order_id)
-                    ).all()
-                    
-                    print(f"  Items in order: {len(order_lines)}")
-                    
-                    all_items = []
-                    for line in order_lines:
-                        product = session.exec(
-                            select(Product).where(Product.product_id == line.product_id)
-                        ).first()
-                        
-                        # Look up the warehouse location for this product
-                        inventory = session.exec(
-                            select(Inventory).where(Inventory.product_id == product.product_id)
-                        ).first()
-                        
-                        location_code = ""
-                        if inventory:
-                            loc = session.exec(
-                                select(Location).where(Location.location_id == inventory.location_id)
-                            ).first()
-                            if loc:
-                                location_code = loc.location_code
-                        
-                        for i in range(line.quantity_ordered):
-                            item = piler.Item(
-                                id=f"{product.sku}-{i}",
-                                name=product.name,
-                                w=int(product.width_cm),
-                                d=int(product.length_cm),
-                                h=int(product.height_cm),
-                                weight=float(product.weight_kg),
-                                allow_tipping=not product.requires_upright,
-                                is_fragile=product.is_fragile,
-                                type_id=product.sku,
-                                location=location_code
-                            )
-                            all_items.append(item)
-                        
-                        print(f"   - Found {line.quantity_ordered}x {product.name}")
-                    
-                    # Assign picking_order based on warehouse location
-                    unique_locations = sorted(set(item.location for item in all_items))
-                    location_to_order = {loc: idx + 1 for idx, loc in enumerate(unique_locations)}
-                    for item in all_items:
-                        item.picking_order = location_to_order.get(item.location, 1)
-                    
-                    total_items = len(all_items)
-                    print(f"  Total items to pack: {total_items}")
-                    
-                    pallet_H = 150 
-                    pallet_W = 80 
-                    pallet_D = 120 
-                    
-                    print(f"  Starting job with {total_items} items...")
-                    pallet_instruction_json = piler.solve_multiple_pallets(all_items, pallet_W, pallet_D, pallet_H)
-                    
-                    # Save results
-                    script_dir = Path(__file__).parent
-                    output_dir = script_dir / "Pallets_Json"
-                    output_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    filename = output_dir / f"pallet_instructions_{order.order_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                    with open(filename, 'w') as f:
-                        json.dump(pallet_instruction_json, f, indent=2)
-                    
-                    print(f"Saved: {filename.name}")
-                    
-                    order.status = OrderStatus.READY
-                    session.add(order)
-                    session.commit()
-                    print(f"Order {order.order_number} status updated to READY (ready for picking)\n")
-
-        await conn.run_sync(process_orders)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Order.order_id).where(Order.status == OrderStatus.NEW)
+        )
+        order_ids = result.scalars().all()
+
+    print(f"Found {len(order_ids)} orders to process\n")
+
+    if not order_ids:
+        print("No orders found with NEW status")
+        return
+
+    # Orders are independent, so they are solved side by side. Each one runs
+    # in its own session; the semaphore keeps one order per solver process
+    # in flight instead of opening a session for every queued order.
+    semaphore = asyncio.Semaphore(_solver_pool_size())
+
+    async def process_one(order_id: int) -> Optional[str]:
+        async with semaphore, AsyncSessionLocal() as db:
+            return await process_single_order(order_id, db)
+
+    results = await asyncio.gather(*(process_one(order_id) for order_id in order_ids))
+    # process_single_order returns None for any order it could not pack
+    failed = sum(r is None for r in results)
+    print(f"Processed {len(order_ids) - failed} orders, {failed} failed")
 
 if __name__ == "__main__":
-    asyncio.run(process_all_new_orders())
\ No newline at end of file
+    try:
+        asyncio.run(process_all_new_orders())
+    finally:
+        shutdown_solver_pool()
\ No newline at end of file
@@ -1,3 +1,7 @@
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -5,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 from pydantic import BaseModel, EmailStr
 
+from app.core.config import get_settings
 from app.core.security import verify_password
 from app.db import get_db
 from app.models import User
@@ -30,6 +35,44 @@ def _role_value(role: object) -> str:
     return getattr(role, "value", str(role))
 
 
+# Credentials that recently passed bcrypt, so hot service-to-service callers
+# skip the deliberately slow check. Keys are an HMAC (server secret) over the
+# email, password and stored hash: a password change misses the cache, and
+# plain passwords are never kept. Only successes are cached.
+# Trade-off: a cache hit answers without bcrypt, so for this TTL a correct
+# email/password pair that was just validated responds measurably faster than
+# a wrong one. Keep the TTL short; it bounds how long that timing signal lasts.
+_VERIFIED_TTL_SECONDS = 60
+_VERIFIED_MAX_ENTRIES = 10_000
+_verified: "OrderedDict[bytes, float]" = OrderedDict()
+
+
+def _verify_password_cached(email: str, password: str, hashed_password: str) -> bool:
+    key = hmac.new(
+        get_settings().secret_key.encode("utf-8"),
+        "\0".join((email, password, hashed_password)).encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+    now = time.monotonic()
+    # Every entry gets the same TTL and is moved to the end when stored, so
+    # the oldest entries expire first: drop them, including an expired hit
+    while _verified:
+        oldest_key, oldest_expiry = next(iter(_verified.items()))
+        if oldest_expiry > now:
+            break
+        del _verified[oldest_key]
+    if key in _verified:
+        return True
+
+    if not verify_password(password, hashed_password):
+        return False
+    _verified[key] = now + _VERIFIED_TTL_SECONDS
+    _verified.move_to_end(key)
+    while len(_verified) > _VERIFIED_MAX_ENTRIES:
+        _verified.popitem(last=False)
+    return True
+
+
 @router.post("/validate", response_model=UserServiceResponse)
 async def validate_credentials(
     body: ValidateRequest,
@@ -38,7 +81,7 @@ async def validate_credentials(
     stmt = select(User).where(User.email == body.email)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not user or not _verify_password_cached(user.email, body.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
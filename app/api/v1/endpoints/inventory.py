@@ -1,7 +1,10 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import literal, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, SQLModel
 
@@ -40,17 +43,26 @@ class InventoryResponse(SQLModel):
     location_code: Optional[str] = None
 
 
+# Built once: validates inventory lists and serialises them straight to JSON bytes
+_INVENTORY_LIST_ADAPTER = TypeAdapter(List[InventoryResponse])
+
+
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
+# The list route returns its JSON bytes as a plain Response, so the schema is
+# declared through `responses` (documented as application/json) instead of
+# response_model
 @router.get(
     "",
-    response_model=List[InventoryResponse],
+    response_class=Response,
+    responses={200: {"model": List[InventoryResponse]}},
     summary="List inventory",
 )
 @router.get(
     "/",
-    response_model=List[InventoryResponse],
+    response_class=Response,
+    responses={200: {"model": List[InventoryResponse]}},
     summary="List inventory",
 )
 async def list_inventory(
@@ -70,7 +82,7 @@ async def list_inventory(
     ),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
-) -> List[InventoryResponse]:
+) -> Response:
     """
     List inventory records with optional filtering.
     
@@ -106,24 +118,15 @@ async def list_inventory(
     stmt = stmt.order_by(Inventory.inventory_id).offset(skip).limit(limit)
     
     result = await db.execute(stmt)
-    rows = result.all()
-    
-    # Convert rows to response model
-    inventory_list = [
-        InventoryResponse(
-            inventory_id=row.inventory_id,
-            product_id=row.product_id,
-            location_id=row.location_id,
-            quantity=row.quantity,
-            sku=row.sku,
-            product_name=row.product_name,
-            product_description=row.product_description,
-            location_code=row.location_code,
-        )
-        for row in rows
-    ]
     
-    return inventory_list
+    # Validated and serialised by the prebuilt adapter instead of
+    # through FastAPI's response handling; a row that no longer matches the
+    # schema still fails here with a 500 rather than producing bad JSON
+    inventory_list = _INVENTORY_LIST_ADAPTER.validate_python([dict(row) for row in result.mappings()])
+    return Response(
+        content=_INVENTORY_LIST_ADAPTER.dump_json(inventory_list),
+        media_type="application/json",
+    )
 
 
 @router.get(
@@ -153,7 +156,7 @@ async def get_inventory(
     )
     
     result = await db.execute(stmt)
-    row = result.one_or_none()
+    row = result.mappings().one_or_none()
     
     if row is None:
         raise HTTPException(
@@ -161,16 +164,7 @@ async def get_inventory(
             detail="Inventory record not found",
         )
     
-    return InventoryResponse(
-        inventory_id=row.inventory_id,
-        product_id=row.product_id,
-        location_id=row.location_id,
-        quantity=row.quantity,
-        sku=row.sku,
-        product_name=row.product_name,
-        product_description=row.product_description,
-        location_code=row.location_code,
-    )
+    return InventoryResponse(**row)
 
 
 @router.post(
@@ -195,59 +189,74 @@ async def create_inventory(
     Validates that the product and location exist before creating.
     Prevents duplicate product-location combinations.
     """
-    # Validate product exists
-    product_result = await db.execute(
-        select(Product).where(Product.product_id == payload.product_id)
+    # Insert only when both the product and the location exist and the pair
+    # is new, then read back the joined details, all in one statement
+    new_row = select(
+        Product.product_id,
+        Location.location_id,
+        literal(payload.quantity),
+    ).where(
+        Product.product_id == payload.product_id,
+        Location.location_id == payload.location_id,
     )
-    product = product_result.scalar_one_or_none()
-    if product is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Product with ID {payload.product_id} not found",
+    inserted = (
+        pg_insert(Inventory)
+        .from_select(["product_id", "location_id", "quantity"], new_row)
+        .on_conflict_do_nothing(index_elements=["product_id", "location_id"])
+        .returning(
+            Inventory.inventory_id,
+            Inventory.product_id,
+            Inventory.location_id,
+            Inventory.quantity,
         )
-    
-    # Validate location exists
-    location_result = await db.execute(
-        select(Location).where(Location.location_id == payload.location_id)
+        .cte("inserted")
     )
-    location = location_result.scalar_one_or_none()
-    if location is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Location with ID {payload.location_id} not found",
+    stmt = (
+        select(
+            inserted.c.inventory_id,
+            inserted.c.product_id,
+            inserted.c.location_id,
+            inserted.c.quantity,
+            Product.sku,
+            Product.name.label("product_name"),
+            Product.description.label("product_description"),
+            Location.location_code,
         )
+        .join(Product, inserted.c.product_id == Product.product_id)
+        .join(Location, inserted.c.location_id == Location.location_id)
+    )
+    
+    result = await db.execute(stmt)
+    row = result.mappings().one_or_none()
     
-    # Check for existing inventory record (unique constraint)
-    existing_result = await db.execute(
-        select(Inventory).where(
-            Inventory.product_id == payload.product_id,
-            Inventory.location_id == payload.location_id,
+    if row is None:
+        # Nothing was inserted; find out why with one more query
+        checks = await db.execute(
+            select(
+                select(Product.product_id).where(Product.product_id == payload.product_id).exists(),
+                select(Location.location_id).where(Location.location_id == payload.location_id).exists(),
+            )
         )
-    )
-    existing = existing_result.scalar_one_or_none()
-    if existing is not None:
+        product_exists, location_exists = checks.one()
+        if not product_exists:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product with ID {payload.product_id} not found",
+            )
+        if not location_exists:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Location with ID {payload.location_id} not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Inventory record already exists for product {payload.product_id} at location {payload.location_id}",
         )
     
-    # Create inventory record
-    inventory = Inventory(**payload.model_dump())
-    db.add(inventory)
     await db.commit()
-    await db.refresh(inventory)
     
     # Return with enriched data
-    return InventoryResponse(
-        inventory_id=inventory.inventory_id,
-        product_id=inventory.product_id,
-        location_id=inventory.location_id,
-        quantity=inventory.quantity,
-        sku=product.sku,
-        product_name=product.name,
-        product_description=product.description,
-        location_code=location.location_code,
-    )
+    return InventoryResponse(**row)
 
 
 @router.put(
@@ -266,16 +275,36 @@ async def update_inventory(
     Note: This only updates the quantity field.
     To move inventory to a different location, delete and create new record.
     """
-    # Get existing inventory with joins
-    stmt = (
-        select(Inventory, Product, Location)
-        .join(Product, Inventory.product_id == Product.product_id)
-        .join(Location, Inventory.location_id == Location.location_id)
+    # Update the quantity and read back the joined details in one statement
+    updated = (
+        update(Inventory)
         .where(Inventory.inventory_id == inventory_id)
+        .values(quantity=payload.quantity)
+        .returning(
+            Inventory.inventory_id,
+            Inventory.product_id,
+            Inventory.location_id,
+            Inventory.quantity,
+        )
+        .cte("updated")
+    )
+    stmt = (
+        select(
+            updated.c.inventory_id,
+            updated.c.product_id,
+            updated.c.location_id,
+            updated.c.quantity,
+            Product.sku,
+            Product.name.label("product_name"),
+            Product.description.label("product_description"),
+            Location.location_code,
+        )
+        .join(Product, updated.c.product_id == Product.product_id)
+        .join(Location, updated.c.location_id == Location.location_id)
     )
     
     result = await db.execute(stmt)
-    row = result.one_or_none()
+    row = result.mappings().one_or_none()
     
     if row is None:
         raise HTTPException(
@@ -283,31 +312,18 @@ async def update_inventory(
             detail="Inventory record not found",
         )
     
-    inventory, product, location = row
-    
-    # Validate quantity is non-negative
+    # Validate quantity is non-negative. Checked after the lookup so an
+    # unknown id still gets 404 first; the update is rolled back.
     if payload.quantity < 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Quantity cannot be negative",
         )
     
-    # Update quantity
-    inventory.quantity = payload.quantity
-    
     await db.commit()
-    await db.refresh(inventory)
     
-    return InventoryResponse(
-        inventory_id=inventory.inventory_id,
-        product_id=inventory.product_id,
-        location_id=inventory.location_id,
-        quantity=inventory.quantity,
-        sku=product.sku,
-        product_name=product.name,
-        product_description=product.description,
-        location_code=location.location_code,
-    )
+    return InventoryResponse(**row)
 
 
 @router.delete(
@@ -1,10 +1,11 @@
 from datetime import datetime, timezone
 from typing import List, Optional
-import json
+import asyncio
 from pathlib import Path as PathLib
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path
 from fastapi.responses import JSONResponse
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, SQLModel
 
@@ -757,12 +758,11 @@ async def get_pallet_instructions(
     latest_file = matching_files[0]
     
     try:
-        with open(latest_file, 'r') as f:
-            pallet_data = json.load(f)
+        pallet_data = orjson.loads(await asyncio.to_thread(latest_file.read_bytes))
         
         return JSONResponse(content=pallet_data)
     
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to parse pallet instructions file",
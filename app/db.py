@@ -25,6 +25,7 @@ from app.models import (
     ConnectionPoint,
     ShelfPath,
     Report,
+    SeedMeta,
 )
 
 load_dotenv()
@@ -71,6 +72,13 @@ async def create_tables():
         await conn.execute(
             text("ALTER TABLE orders ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP")
         )
+        # Indexes added after the first release; create_all skips existing tables
+        await conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_order_status ON orders (status)")
+        )
+        await conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_order_line_order ON order_lines (order_id)")
+        )
 
     # ALTER TYPE ADD VALUE must run outside a transaction in PostgreSQL
     async with engine.connect() as conn:
@@ -16,7 +16,8 @@ from app.api.v1.endpoints.navigation import router as navigation_router
 from app.db import create_tables, get_db
 from app.services.packing_service import start_packing_service
 from app.add_initial_users import add_initial_users
-from app.add_initial_orders import create_test_data, setup_navigation
+from app.add_initial_orders import close_http_client, create_test_data, setup_navigation
+from app.algorithms.PalletPiler.piler_adapter import shutdown_solver_pool
 
 
 @asynccontextmanager
@@ -35,6 +36,8 @@ async def lifespan(app: FastAPI):
     yield  # Application runs while inside this block
 
     print("Application is shutting down...")
+    await close_http_client()
+    shutdown_solver_pool()
 
 
 app = FastAPI(lifespan=lifespan, redirect_slashes=False)
@@ -25,6 +25,7 @@ from .models import (
     ConnectionPoint,
     ShelfPath,
     Report,
+    SeedMeta,
 )
 
 __all__ = [ # = what gets imported if someone writes 'from models import *'
@@ -51,4 +52,5 @@ __all__ = [ # = what gets imported if someone writes 'from models import *'
     "ConnectionPoint",
     "ShelfPath",
     "Report",
+    "SeedMeta",
 ]
@@ -146,6 +146,10 @@ class Order(SQLModel, table=True):
     created_at: datetime = Field(default_factory=utc_now, sa_column=Column(TIMESTAMP))
     completed_at: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP))
     promised_ship_date: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP))
+    
+    __table_args__ = (
+        Index("idx_order_status", "status"),
+    )
 
 
 class OrderLine(SQLModel, table=True):
@@ -156,6 +160,10 @@ class OrderLine(SQLModel, table=True):
     product_id: int = Field(foreign_key="products.product_id")
     quantity_ordered: int
     quantity_picked: int = Field(default=0)
+    
+    __table_args__ = (
+        Index("idx_order_line_order", "order_id"),
+    )
 
 
 class Pallet(SQLModel, table=True):
@@ -322,3 +330,10 @@ class Report(SQLModel, table=True):
         Index("idx_report_order", "order_id", "created_at"),
     )
 
+
+class SeedMeta(SQLModel, table=True):
+    """Key/value bookkeeping for the startup seed scripts."""
+    __tablename__ = "seed_meta"
+
+    key: str = Field(primary_key=True, max_length=50)
+    value: str = Field(max_length=128)